@@ -0,0 +1,105 @@
+import argparse
+import os
+
+import pandas as pd
+from rapidfuzz import process, fuzz
+
+# Same steps as notebooks/cleaning.ipynb, runnable outside the notebook
+
+DROPPED_COLUMNS = ['Address', 'Timestamp', "Phone Number", "Unnamed: 0", 'Website', 'Google Map ID']
+
+# Define known bank names
+bank_names = {
+    "CIH": ["CIH",'Cih','Banque CIH','CIH','CIH bank','CIH Bank - Agence Mohammed V','CIH Bank- Agence Dakhla',
+            'CIH Bank - Agence Hay Salam','CIH Bank - Agence Bensergao','CIH BANK','CIH Banque','CIH Bank - Agence'],
+    "Attijariwafa Bank": ["Attijariwafa Bank","Attijari", "Attijari Wafabank", "attijari fes", "attijari bank",
+                          'Attijariwafa Bank - El Houda','Attijariwafa Bank - Agence Essalam Expansion',
+                          'Attijariwafa Bank - Agence Agadir Cadi Ayad','Attijariwafa Bank - Agence Agadir Hay Dakhla',
+                          'Attijariwafa Bank 11 Janvier','Attijari Wafa Banque','Attijariwafa bank','Attijari wafa bank'],
+    "BMCE Bank": ["BMCE BANK El Wafaa", "BMCE Bank", "bmce fes", "bmcebank"],
+    "Banque Populaire": ["Banque Populaire","BANQUE POPULAIRE - Centre d'Affaire Fes Taza",'banque populaire',"Banque Populaire",'Banque Chaabi',
+                          "B. Populaire", "populaire fes","Centre d'estivage Banque Populaire",'Banque Populaire Siège Centre Sud',
+                          'Banque Populaire - Agence Bouabid','Banque Populaire - Agence Riad Salam','Banque Populaire البنك الشعبي','Banque Populaire.','Groupe Scolaire de La Fondation Banque Populaire_Tanger',
+                          'La banque populaire','banque populaire','Banque populaire','Agence Banque Populaire',
+                          'Banque Poulaire','Banque populaire Admime','Banque Populaire -Agence Carrefour'],
+    "Al Barid Bank": ["Al Barid Bank",'Poste Maroc - Al Barid Bank','Poste Maroc - Al Barid Bank - Barid Cash','Barid Bank',
+                      'BARID BANK','Al Barid Bank Fès Narjis','Al Barid Bank'],
+    "Bank of Africa":["Bank of Africa",'Agence Bank of Africa','Bank of Africa - Agence Hassan 1er','Bank of Africa Talborjt',
+                      'Bank of Africa - Batoir','Bank of Africa - Agence Bensergao','Bank of Africa (BMCE)',
+                      'BMCE','bmce bank','Banque BMCE', 'Bank of Africa Agdal'],
+    "Bank Assafa": ['Bank Assafa','Assafa bank'],
+    "Umnia Bank" : ['Umnia Bank Casablanca Derb Ghalef','Umnia Bank Casablanca Souna','Umnia Bank','Umnia Bank Berrechid'],
+    "BMCI":['BMCI Bank'"BMCI"],
+    "Arab Bank": ["Arab Bank"],
+    "Bank Al-Maghrib": ["Bank Al-Maghrib"],
+    "Bank Al Yousr": ["Bank Al Yousr",'Bank AL YOUSR بنك اليسر'],
+    "Crédit Agricole": ['Crédit Agricole Du Maroc','crédit agricole','CREDIT AGRICOLE'],
+    "Société Générale": ['Société Générale Bank','Espace Libre Service - Société Générale Maroc','Société Générale GAB','Société Générale Temara Massira']
+}
+
+
+# List of valid Moroccan cities
+valid_cities = [
+    "agadir", "ifrane", "dakhla", "fes", "errachidia", "casablanca", "berkane", "azilal", "harhoura", "el+jadida",
+]
+
+
+# Function to match business names
+def match_bank(name):
+    name = name.lower().strip()  # Normalize input
+    best_match = "Other"
+    highest_score = 0
+
+    for bank, variations in bank_names.items():
+        if not variations:  # Skip empty lists
+            continue
+
+        match, score, _ = process.extractOne(name, variations, scorer=fuzz.partial_ratio)
+
+        if match and score > highest_score:  # Ensure match is valid
+            best_match = bank
+            highest_score = score
+
+    return best_match if highest_score >= 80 else "Other"
+
+
+def clean(rawdata):
+    """
+    Clean the raw Google Maps export into the updated dataset.
+    """
+    rawdata = rawdata.drop(columns=DROPPED_COLUMNS)
+    rawdata = rawdata[rawdata["Review Text"] != "No review text found"]
+
+    rawdata["Business Name"] = rawdata["Business Name"].apply(match_bank)
+
+    # Remove rows where the city is not in the valid list
+    rawdata["City"] = rawdata["City"].str.lower().str.strip()
+    rawdata = rawdata[rawdata["City"].isin(valid_cities)]
+
+    rawdata['sentiment'] = rawdata['Stars'].apply(lambda x: 1 if x >= 3 else 0)
+    return rawdata
+
+
+def clean_files(raw_path, output_dir):
+    """
+    Write updated_dataset.csv, star_dataset.csv and review_dataset.csv.
+    """
+    rawdata = clean(pd.read_csv(raw_path))
+    rawdata.to_csv(os.path.join(output_dir, "updated_dataset.csv"), index=False)
+
+    df_star = rawdata[["City", "Business Name", "Stars", "TrueTimestamp", "sentiment"]]  # Star Dataset
+    df_review = rawdata[["City", "Business Name", "Review Text", "TrueTimestamp", "sentiment"]]  # Review Dataset
+
+    df_star.to_csv(os.path.join(output_dir, "star_dataset.csv"), index=False)
+    df_review.to_csv(os.path.join(output_dir, "review_dataset.csv"), index=False)
+    return rawdata
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Clean the raw review export")
+    parser.add_argument("--raw", default="../data/raw/original_data.csv")
+    parser.add_argument("--output-dir", default="../data/cleaned")
+    args = parser.parse_args()
+
+    cleaned = clean_files(args.raw, args.output_dir)
+    print(f"Cleaned dataset: {len(cleaned)} reviews written to {args.output_dir}")
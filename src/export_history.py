@@ -0,0 +1,167 @@
+import gzip
+import logging
+import os
+from datetime import datetime, date
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+HISTORY_COLUMNS = ["timestamp", "text", "rating", "sentiment", "confidence"]
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+DEFAULT_CHUNK_SIZE = 5000
+
+
+class ExportCancelled(Exception):
+    """Raised when an export is cancelled before it completes."""
+
+
+def detect_format(path: str) -> str:
+    """
+    Pick the output format from the file extension: csv, csv.gz or parquet.
+    """
+    lower = path.lower()
+    if lower.endswith(".parquet"):
+        return "parquet"
+    if lower.endswith(".csv.gz") or lower.endswith(".gz"):
+        return "csv.gz"
+    return "csv"
+
+
+def matches_filters(entry: Dict[str, object],
+                    date_from: Optional[date] = None,
+                    date_to: Optional[date] = None,
+                    sentiments: Optional[Iterable[str]] = None) -> bool:
+    """
+    Check a history entry against an inclusive date range and a sentiment set.
+    """
+    if sentiments is not None and entry["sentiment"] not in sentiments:
+        return False
+    if date_from is not None or date_to is not None:
+        day = datetime.strptime(entry["timestamp"], TIMESTAMP_FORMAT).date()
+        if date_from is not None and day < date_from:
+            return False
+        if date_to is not None and day > date_to:
+            return False
+    return True
+
+
+def iter_history_chunks(history: List[Dict[str, object]],
+                        chunk_size: int = DEFAULT_CHUNK_SIZE,
+                        date_from: Optional[date] = None,
+                        date_to: Optional[date] = None,
+                        sentiments: Optional[Iterable[str]] = None) -> Iterator[Tuple[int, List[Dict[str, object]]]]:
+    """
+    Yield (entries_scanned, chunk) with at most chunk_size filtered entries.
+
+    A (possibly empty) chunk is also yielded every chunk_size scanned entries
+    so callers can report progress and cancel during selective filters.
+    Only the entries present when iteration starts are visited, so the
+    history can keep growing on the GUI thread while an export runs.
+    """
+    if sentiments is not None:
+        sentiments = set(sentiments)
+    total = len(history)
+    chunk = []
+    for i in range(total):
+        entry = history[i]
+        if matches_filters(entry, date_from, date_to, sentiments):
+            chunk.append(entry)
+        if len(chunk) >= chunk_size or (i + 1) % chunk_size == 0:
+            yield i + 1, chunk
+            chunk = []
+    if chunk or total % chunk_size:
+        yield total, chunk
+
+
+def _chunk_frame(chunk: List[Dict[str, object]]) -> pd.DataFrame:
+    return pd.DataFrame(chunk, columns=HISTORY_COLUMNS)
+
+
+def export_history(history: List[Dict[str, object]],
+                   path: str,
+                   chunk_size: int = DEFAULT_CHUNK_SIZE,
+                   date_from: Optional[date] = None,
+                   date_to: Optional[date] = None,
+                   sentiments: Optional[Iterable[str]] = None,
+                   progress: Optional[Callable[[int, int], None]] = None,
+                   is_cancelled: Optional[Callable[[], bool]] = None) -> int:
+    """
+    Stream history to CSV, gzip CSV or Parquet one chunk at a time.
+
+    Only one chunk is materialised as a DataFrame at once. progress is called
+    with (entries_scanned, total_entries) after each chunk; if is_cancelled
+    returns True the partial file is removed and ExportCancelled is raised.
+    Returns the number of rows written.
+    """
+    fmt = detect_format(path)
+    total = len(history)
+    written = 0
+
+    chunks = iter_history_chunks(history, chunk_size, date_from, date_to, sentiments)
+
+    if fmt == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise ImportError("Parquet export requires pyarrow (pip install pyarrow)")
+
+        schema = pa.schema([
+            ("timestamp", pa.string()),
+            ("text", pa.string()),
+            ("rating", pa.float64()),
+            ("sentiment", pa.string()),
+            ("confidence", pa.float64()),
+        ])
+        writer = pq.ParquetWriter(path, schema)
+        handle = None
+    else:
+        writer = None
+        if fmt == "csv.gz":
+            handle = gzip.open(path, "wt", encoding="utf-8", newline="")
+        else:
+            handle = open(path, "w", encoding="utf-8", newline="")
+        # Header is written even when the filters match nothing
+        _chunk_frame([]).to_csv(handle, index=False)
+
+    try:
+        for scanned, chunk in chunks:
+            if is_cancelled is not None and is_cancelled():
+                raise ExportCancelled()
+
+            if chunk:
+                df = _chunk_frame(chunk)
+                if writer is not None:
+                    writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+                else:
+                    df.to_csv(handle, index=False, header=False)
+                written += len(chunk)
+
+            if progress is not None:
+                progress(scanned, total)
+    except BaseException:
+        _close(writer, handle)
+        _remove_partial(path)
+        raise
+
+    _close(writer, handle)
+    if progress is not None:
+        progress(total, total)
+    logger.info(f"Exported {written} history rows to {path}")
+    return written
+
+
+def _close(writer, handle):
+    if writer is not None:
+        writer.close()
+    if handle is not None:
+        handle.close()
+
+
+def _remove_partial(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        logger.warning(f"Could not remove partial export {path}")
@@ -0,0 +1,243 @@
+import argparse
+import json
+import logging
+import math
+import random
+import threading
+import time
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def load_traffic(csv_path: str, n_requests: int, seed: int = 42) -> List[str]:
+    """
+    Build a request stream by sampling review texts with replacement.
+
+    Rows are drawn uniformly, so duplicated reviews ("Bon service", emoji-only
+    rows...) keep their real frequency and long reviews keep their long tail.
+    """
+    texts = pd.read_csv(csv_path, usecols=["Review Text"])["Review Text"].dropna().astype(str).tolist()
+    rng = random.Random(seed)
+    return [rng.choice(texts) for _ in range(n_requests)]
+
+
+class FallbackCounter(logging.Handler):
+    """
+    Tracks, per thread, whether SentimentAnalyzer logged a warning/error
+    while falling back to its default rating or confidence.
+    """
+
+    def __init__(self):
+        super().__init__(level=logging.WARNING)
+        self.flagged = set()
+        # Not self.lock: logging.Handler already holds that one around emit()
+        self.flagged_lock = threading.Lock()
+
+    def emit(self, record):
+        # record.thread is the threading.get_ident() of the logging thread
+        with self.flagged_lock:
+            self.flagged.add(record.thread)
+
+    def take(self, ident: int) -> bool:
+        """Whether thread `ident` logged a fallback since the last call; resets it."""
+        with self.flagged_lock:
+            if ident in self.flagged:
+                self.flagged.discard(ident)
+                return True
+            return False
+
+
+class InProcessTarget:
+    """Calls SentimentAnalyzer.analyze_review directly."""
+
+    def __init__(self, model_path: str, vectorizer_path: str):
+        import predict_star
+        self.analyzer = predict_star.SentimentAnalyzer(model_path, vectorizer_path)
+        self.fallbacks = FallbackCounter()
+        predict_star.logger.addHandler(self.fallbacks)
+
+    def __call__(self, text: str) -> bool:
+        ident = threading.get_ident()
+        self.fallbacks.take(ident)  # drop anything left over from a failed call
+        self.analyzer.analyze_review(text)
+        # One fallback per request, even if both rating and confidence fell back
+        return self.fallbacks.take(ident)
+
+
+class HttpTarget:
+    """POSTs {"text": ...} as JSON to a local HTTP endpoint."""
+
+    def __init__(self, url: str, timeout: float = 10.0):
+        self.url = url
+        self.timeout = timeout
+
+    def __call__(self, text: str) -> bool:
+        body = json.dumps({"text": text}).encode("utf-8")
+        request = urllib.request.Request(self.url, data=body, headers={"Content-Type": "application/json"})
+        with urllib.request.urlopen(request, timeout=self.timeout) as response:
+            payload = response.read()
+        # An endpoint may flag degraded answers with {"fallback": true}
+        try:
+            return bool(json.loads(payload).get("fallback", False))
+        except (ValueError, AttributeError):
+            return False
+
+
+def percentile(sorted_values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return None
+    rank = max(1, math.ceil(pct / 100 * len(sorted_values)))
+    return sorted_values[rank - 1]
+
+
+def summarize(samples: List[Dict[str, float]], duration: float) -> Dict[str, object]:
+    latencies = sorted(s["latency_ms"] for s in samples if not s["error"])
+    errors = sum(1 for s in samples if s["error"])
+    fallbacks = sum(1 for s in samples if s["fallback"])
+    return {
+        "requests": len(samples),
+        "errors": errors,
+        "fallbacks": fallbacks,
+        "throughput_rps": round(len(samples) / duration, 2) if duration > 0 else None,
+        "p50_ms": percentile(latencies, 50),
+        "p95_ms": percentile(latencies, 95),
+        "p99_ms": percentile(latencies, 99),
+        "max_ms": latencies[-1] if latencies else None,
+    }
+
+
+class LoadRunner:
+    """
+    Replays texts against a target in open or closed loop.
+
+    Open loop: requests are issued at a fixed QPS regardless of completions
+    and latency is measured from the scheduled send time, so queueing delay
+    is included. Closed loop: `concurrency` workers send back-to-back.
+    """
+
+    def __init__(self, target, texts: List[str], concurrency: int = 4):
+        self.target = target
+        self.texts = texts
+        self.concurrency = concurrency
+        self.samples = []
+        self.lock = threading.Lock()
+        self.start_time = 0.0
+
+    def _send(self, text: str, scheduled: float):
+        error = False
+        fallback = False
+        try:
+            fallback = self.target(text)
+        except Exception as e:
+            logger.debug(f"Request failed: {e}")
+            error = True
+        done = time.perf_counter()
+        with self.lock:
+            self.samples.append({
+                "t": done - self.start_time,
+                "latency_ms": (done - scheduled) * 1000,
+                "error": error,
+                "fallback": fallback,
+            })
+
+    def run_open(self, qps: float) -> float:
+        interval = 1.0 / qps
+        self.start_time = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=self.concurrency) as pool:
+            for i, text in enumerate(self.texts):
+                scheduled = self.start_time + i * interval
+                delay = scheduled - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                pool.submit(self._send, text, scheduled)
+        return time.perf_counter() - self.start_time
+
+    def run_closed(self) -> float:
+        position = iter(self.texts)
+        position_lock = threading.Lock()
+
+        def worker():
+            while True:
+                with position_lock:
+                    text = next(position, None)
+                if text is None:
+                    return
+                self._send(text, time.perf_counter())
+
+        self.start_time = time.perf_counter()
+        threads = [threading.Thread(target=worker) for _ in range(self.concurrency)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        return time.perf_counter() - self.start_time
+
+    def timeline(self, window: float) -> List[Dict[str, object]]:
+        """Summaries over consecutive windows of `window` seconds."""
+        buckets = {}
+        for sample in self.samples:
+            buckets.setdefault(int(sample["t"] // window), []).append(sample)
+        return [
+            dict(window_start_s=index * window, **summarize(buckets[index], window))
+            for index in sorted(buckets)
+        ]
+
+
+def print_table(summary: Dict[str, object], timeline: List[Dict[str, object]]):
+    columns = ["window_start_s", "requests", "throughput_rps", "p50_ms", "p95_ms", "p99_ms", "max_ms",
+               "errors", "fallbacks"]
+    rows = timeline + [dict(window_start_s="total", **summary)]
+    print(pd.DataFrame(rows, columns=columns).to_string(index=False, float_format=lambda v: f"{v:.1f}"))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Replay review traffic and measure end-to-end latency")
+    parser.add_argument("--data", default="../data/cleaned/updated_dataset.csv")
+    parser.add_argument("--requests", type=int, default=1000, help="Number of requests to send")
+    parser.add_argument("--mode", choices=["open", "closed"], default="closed")
+    parser.add_argument("--qps", type=float, default=50.0, help="Arrival rate in open-loop mode")
+    parser.add_argument("--concurrency", type=int, default=4, help="Workers (closed) or max in flight (open)")
+    parser.add_argument("--url", default=None, help="HTTP endpoint; in-process SentimentAnalyzer if omitted")
+    parser.add_argument("--model", default="../models/model_star.pkl")
+    parser.add_argument("--vectorizer", default="../models/vectorizer.pkl")
+    parser.add_argument("--window", type=float, default=1.0, help="Timeline window in seconds")
+    parser.add_argument("--output", default=None, help="Write the JSON report here")
+    parser.add_argument("--seed", type=int, default=42)
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    texts = load_traffic(args.data, args.requests, args.seed)
+    target = HttpTarget(args.url) if args.url else InProcessTarget(args.model, args.vectorizer)
+
+    runner = LoadRunner(target, texts, args.concurrency)
+    duration = runner.run_open(args.qps) if args.mode == "open" else runner.run_closed()
+
+    summary = summarize(runner.samples, duration)
+    timeline = runner.timeline(args.window)
+    report = {
+        "config": {
+            "target": args.url or "in-process",
+            "mode": args.mode,
+            "qps": args.qps if args.mode == "open" else None,
+            "concurrency": args.concurrency,
+            "requests": args.requests,
+            "seed": args.seed,
+        },
+        "summary": summary,
+        "timeline": timeline,
+    }
+
+    print_table(summary, timeline)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
@@ -1,19 +1,27 @@
 import sys
+import logging
 
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QTextEdit, QPushButton, QTabWidget,
                              QMessageBox, QFileDialog, QStatusBar, QFrame, QSplitter,
                              QTableWidget, QTableWidgetItem,
-                             QAction, QDateEdit)
-from PyQt5.QtCore import Qt,QDate
-from PyQt5.QtGui import QColor, QPalette,QIcon
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
-from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
+                             QAction, QDateEdit, QDialog, QDialogButtonBox, QFormLayout,
+                             QComboBox, QCheckBox, QProgressDialog, QListWidget)
+from PyQt5.QtCore import Qt, QDate, QTimer, QObject, QRunnable, QThreadPool, QThread, pyqtSignal
+from PyQt5.QtGui import QColor, QPalette, QIcon, QImage, QPixmap
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
 from datetime import datetime, timedelta
-import pandas as pd
 from predict_star import SentimentAnalyzer
+from export_history import export_history, ExportCancelled
+from streaming_stats import ReviewStats
+from similar_reviews import load_or_build_index
 
+logger = logging.getLogger(__name__)
+
+
+# Delay (ms) after the last keystroke before a live preview is computed
+LIVE_ANALYSIS_DELAY_MS = 300
 
 
 class ModernStyle:
@@ -70,11 +78,24 @@ class AnalysisResultWidget(QWidget):
         # Sentiment card
         self.sentiment_card = self.create_card("😊 Sentiment", "NAN", "Waiting for input...")
 
+        # Tells a live preview apart from a committed analysis
+        self.mode_label = QLabel("")
+        self.mode_label.setAlignment(Qt.AlignCenter)
+        self.mode_label.setStyleSheet("color: #AAAAAA; font-style: italic;")
+
+        # Closest reviews from the dataset and history, to explain the prediction
+        self.similar_list = QListWidget()
+        self.similar_list.setWordWrap(True)
+
         layout.addWidget(self.rating_card)
         layout.addWidget(self.sentiment_card)
-        layout.addStretch()
+        layout.addWidget(self.mode_label)
+        layout.addWidget(QLabel("Similar past reviews"))
+        layout.addWidget(self.similar_list)
 
-    def update_results(self, result):
+    def update_results(self, result, preview=False):
+
+        self.mode_label.setText("Live preview" if preview else "Analyzed")
 
         # Update rating card
         rating_label = self.rating_card.findChild(QLabel, "value_label")
@@ -88,6 +109,23 @@ class AnalysisResultWidget(QWidget):
         color = "#6EE7B7" if result['sentiment'] == 'positive' else "#FCA5A5"
         sentiment_label.setStyleSheet(f"color: {color};")
 
+    def reset(self):
+        """Back to the empty state shown before any analysis"""
+        self.mode_label.setText("")
+        self.rating_card.findChild(QLabel, "value_label").setText("NAN")
+        sentiment_label = self.sentiment_card.findChild(QLabel, "value_label")
+        sentiment_label.setText("NAN")
+        sentiment_label.setStyleSheet("")
+        self.similar_list.clear()
+
+    def update_similar(self, matches):
+
+        self.similar_list.clear()
+        for match in matches:
+            # Dataset reviews carry real stars, history entries predicted ratings
+            stars = f"{match['stars']:.0f}★" if match['source'] == 'dataset' else f"{match['stars']:.1f} (predicted)"
+            self.similar_list.addItem(f"{stars}  [{match['score']:.2f}]  {match['text']}")
+
     def create_card(self, title, value, placeholder=""):
         card = QFrame()
         card.setFrameShape(QFrame.StyledPanel)
@@ -123,10 +161,245 @@ class AnalysisResultWidget(QWidget):
         return card
 
 
+class LiveAnalysisSignals(QObject):
+    """Signals emitted by a live analysis task (generation, result)"""
+    finished = pyqtSignal(int, object)
+
+
+class LiveAnalysisTask(QRunnable):
+    """Runs one live-preview analysis off the UI thread"""
+
+    def __init__(self, analyzer, text, generation, current_generation):
+        super().__init__()
+        self.analyzer = analyzer
+        self.text = text
+        self.generation = generation
+        self.current_generation = current_generation
+        self.signals = LiveAnalysisSignals()
+
+    def run(self):
+        # Superseded while waiting in the pool: skip the work entirely
+        if self.current_generation() != self.generation:
+            return
+        try:
+            result = self.analyzer.analyze_review(self.text)
+        except Exception:
+            return
+        self.signals.finished.emit(self.generation, result)
+
+
+class ExportWorker(QThread):
+    """Streams history to disk in chunks off the UI thread"""
+    progress = pyqtSignal(int, int)
+    completed = pyqtSignal(int)
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    def __init__(self, history, file_name, filters, parent=None):
+        super().__init__(parent)
+        self.history = history
+        self.file_name = file_name
+        self.filters = filters
+
+    def run(self):
+        try:
+            written = export_history(
+                self.history, self.file_name,
+                progress=self.progress.emit,
+                is_cancelled=self.isInterruptionRequested,
+                **self.filters
+            )
+            self.completed.emit(written)
+        except ExportCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+
+
+class ExportOptionsDialog(QDialog):
+    """Optional date-range and sentiment filters for an export"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Export Options")
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QFormLayout(self)
+
+        self.use_dates = QCheckBox("Filter by date")
+        self.date_from = QDateEdit()
+        self.date_from.setCalendarPopup(True)
+        self.date_from.setDate(QDate.currentDate().addDays(-7))
+        self.date_to = QDateEdit()
+        self.date_to.setCalendarPopup(True)
+        self.date_to.setDate(QDate.currentDate())
+
+        self.sentiment_combo = QComboBox()
+        self.sentiment_combo.addItems(["All", "Positive", "Neutral", "Negative"])
+
+        layout.addRow(self.use_dates)
+        layout.addRow("From:", self.date_from)
+        layout.addRow("To:", self.date_to)
+        layout.addRow("Sentiment:", self.sentiment_combo)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Ok | QDialogButtonBox.Cancel)
+        buttons.accepted.connect(self.accept)
+        buttons.rejected.connect(self.reject)
+        layout.addRow(buttons)
+
+    def filters(self):
+        filters = {}
+        if self.use_dates.isChecked():
+            filters["date_from"] = self.date_from.date().toPyDate()
+            filters["date_to"] = self.date_to.date().toPyDate()
+        sentiment = self.sentiment_combo.currentText()
+        if sentiment != "All":
+            filters["sentiments"] = [sentiment.lower()]
+        return filters
+
+
+class IndexBuildSignals(QObject):
+    """Signals emitted when the similar-reviews index is ready or failed"""
+    ready = pyqtSignal(object)
+    failed = pyqtSignal(str)
+
+
+class IndexBuildTask(QRunnable):
+    """Loads the persisted similar-reviews index, building it if needed"""
+
+    def __init__(self, vectorizer, csv_path, index_path):
+        super().__init__()
+        self.vectorizer = vectorizer
+        self.csv_path = csv_path
+        self.index_path = index_path
+        self.signals = IndexBuildSignals()
+
+    def run(self):
+        try:
+            index = load_or_build_index(self.vectorizer, self.csv_path, self.index_path)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+            return
+        self.signals.ready.emit(index)
+
+
+class ChartRenderSignals(QObject):
+    """Signals emitted by a chart render task (generation, rgba bytes, width, height)"""
+    rendered = pyqtSignal(int, bytes, int, int)
+
+
+class ChartRenderTask(QRunnable):
+    """Rasterizes a chart with the Agg backend off the UI thread"""
+
+    def __init__(self, draw, data, width, height, dpi, generation):
+        super().__init__()
+        self.draw = draw
+        self.data = data
+        self.width = width
+        self.height = height
+        self.dpi = dpi
+        self.generation = generation
+        self.signals = ChartRenderSignals()
+
+    def run(self):
+        # A standalone Figure (no pyplot) is safe to build on a worker thread
+        # An exception escaping QRunnable.run would abort the whole process
+        try:
+            figure = Figure(figsize=(self.width / self.dpi, self.height / self.dpi),
+                            dpi=self.dpi, facecolor='#353535')
+            canvas = FigureCanvasAgg(figure)
+            self.draw(figure, self.data)
+            canvas.draw()
+            width, height = canvas.get_width_height()
+            pixels = bytes(canvas.buffer_rgba())
+        except Exception as e:
+            logger.error(f"Chart rendering failed: {str(e)}")
+            return
+        self.signals.rendered.emit(self.generation, pixels, width, height)
+
+
+class LazyChart(QLabel):
+    """
+    Chart that only renders when visible.
+
+    set_data() just marks the chart dirty; the redraw happens when the chart
+    is shown (or immediately if it already is) and is rasterized on a
+    background thread. Stale renders are discarded by generation.
+    """
+
+    render_pool = None
+
+    def __init__(self, draw, parent=None):
+        super().__init__(parent)
+        self.draw = draw
+        self.data = None
+        self.dirty = False
+        self.generation = 0
+        self.setAlignment(Qt.AlignCenter)
+        self.setMinimumSize(200, 150)
+
+        # Coalesce bursts of resize events into one render
+        self.resize_timer = QTimer(self)
+        self.resize_timer.setSingleShot(True)
+        self.resize_timer.setInterval(100)
+        self.resize_timer.timeout.connect(self.render_if_visible)
+
+        if LazyChart.render_pool is None:
+            # matplotlib is not thread-safe across figures sharing font caches,
+            # so all charts share a single render thread
+            LazyChart.render_pool = QThreadPool()
+            LazyChart.render_pool.setMaxThreadCount(1)
+
+    def set_data(self, data):
+        """Store new chart data; data must not be mutated afterwards"""
+        self.data = data
+        self.dirty = True
+        self.render_if_visible()
+
+    def render_if_visible(self):
+        if self.dirty and self.isVisible():
+            self.render()
+
+    def render(self):
+        self.dirty = False
+        self.generation += 1
+        ratio = self.devicePixelRatioF()
+        dpi = 100 * ratio
+        task = ChartRenderTask(self.draw, self.data,
+                               max(1, int(self.width() * ratio)), max(1, int(self.height() * ratio)),
+                               dpi, self.generation)
+        task.signals.rendered.connect(self.on_rendered)
+        LazyChart.render_pool.start(task)
+
+    def on_rendered(self, generation, data, width, height):
+        if generation != self.generation:
+            return
+        image = QImage(data, width, height, QImage.Format_RGBA8888).copy()
+        pixmap = QPixmap.fromImage(image)
+        pixmap.setDevicePixelRatio(self.devicePixelRatioF())
+        self.setPixmap(pixmap)
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self.render_if_visible()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        if self.data is not None:
+            self.dirty = True
+            self.resize_timer.start()
+
+
 class HistoryWidget(QWidget):
     def __init__(self, parent=None):
         super().__init__(parent)
         self.history_data = []
+        # Per-day streaming stats, updated only with entries not yet seen
+        self.daily_stats = {}
+        self.indexed_count = 0
+        # Table and chart are only rebuilt when the tab is visible
+        self.view_dirty = False
         self.setup_ui()
 
     def setup_ui(self):
@@ -154,6 +427,10 @@ class HistoryWidget(QWidget):
 
         layout.addLayout(filter_layout)
 
+        # Summary of the selected range
+        self.summary_label = QLabel("")
+        layout.addWidget(self.summary_label)
+
         # History table
         self.history_table = QTableWidget()
         self.history_table.setColumnCount(5)
@@ -166,20 +443,35 @@ class HistoryWidget(QWidget):
         layout.addWidget(self.history_table)
 
         # History visualization
-        self.history_figure = plt.figure(facecolor='#353535')
-        self.history_canvas = FigureCanvas(self.history_figure)
-        self.history_toolbar = NavigationToolbar(self.history_canvas, self)
-
-        layout.addWidget(self.history_toolbar)
-        layout.addWidget(self.history_canvas)
+        self.history_chart = LazyChart(self.draw_history_plot)
+        layout.addWidget(self.history_chart)
 
     def update_history(self, history_data):
 
+        # A replaced or shrunk list (e.g. cleared history) invalidates the stats
+        if history_data is not self.history_data or len(history_data) < self.indexed_count:
+            self.daily_stats = {}
+            self.indexed_count = 0
+
         self.history_data = history_data
-        self.filter_history()
+        for i in range(self.indexed_count, len(history_data)):
+            item = history_data[i]
+            day = datetime.strptime(item['timestamp'], "%Y-%m-%d %H:%M:%S").date()
+            self.daily_stats.setdefault(day, ReviewStats()).add(item['rating'], item['sentiment'])
+        self.indexed_count = len(history_data)
+
+        self.view_dirty = True
+        if self.isVisible():
+            self.filter_history()
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        if self.view_dirty:
+            self.filter_history()
 
     def filter_history(self):
 
+        self.view_dirty = False
         from_date = self.date_from.date().toPyDate()
         to_date = self.date_to.date().toPyDate() + timedelta(days=1)  # Include the end date
 
@@ -197,34 +489,55 @@ class HistoryWidget(QWidget):
             self.history_table.setItem(row, 3, QTableWidgetItem(item['sentiment'].capitalize()))
             self.history_table.setItem(row, 4, QTableWidgetItem(f"{item['confidence']:.2f}"))
 
+        # Merge the per-day accumulators that fall in the range
+        daily = sorted((day, stats) for day, stats in self.daily_stats.items()
+                       if from_date <= day < to_date)
+        range_stats = ReviewStats()
+        for _, stats in daily:
+            range_stats.merge(stats)
+        self.update_summary(range_stats)
 
-        self.update_history_plot(filtered_data)
+        self.update_history_plot(daily)
 
-    def update_history_plot(self, filtered_data):
+    def update_summary(self, stats):
 
-        self.history_figure.clear()
+        if not stats.count:
+            self.summary_label.setText("")
+            return
+        self.summary_label.setText(
+            f"{stats.count} reviews  |  Avg {stats.mean:.2f} ± {stats.std:.2f}  |  "
+            f"Median {stats.quantile(0.5):.1f}  |  Positive {stats.share('positive') * 100:.1f}%"
+        )
+
+    def update_history_plot(self, daily):
 
-        if not filtered_data:
-            ax = self.history_figure.add_subplot(111)
+        # Snapshot plain values: the accumulators keep changing on the UI thread
+        self.history_chart.set_data({
+            'dates': [day for day, _ in daily],
+            'ratings': [stats.mean for _, stats in daily],
+            'positive_shares': [stats.share('positive') for _, stats in daily],
+        })
+
+    @staticmethod
+    def draw_history_plot(figure, data):
+
+        if not data['dates']:
+            ax = figure.add_subplot(111)
             ax.text(0.5, 0.5, 'No data in selected date range',
                     ha='center', va='center', color='white')
             ax.set_facecolor('#353535')
-            self.history_canvas.draw()
             return
 
 
-        df = pd.DataFrame(filtered_data)
-        df['date'] = pd.to_datetime(df['timestamp']).dt.date
-        daily_stats = df.groupby('date').agg({
-            'rating': 'mean',
-            'sentiment': lambda x: (x == 'positive').mean()
-        }).reset_index()
+        dates = data['dates']
+        ratings = data['ratings']
+        positive_shares = data['positive_shares']
 
 
-        ax = self.history_figure.add_subplot(111)
+        ax = figure.add_subplot(111)
 
 
-        ax.plot(daily_stats['date'], daily_stats['rating'],
+        ax.plot(dates, ratings,
                 marker='o', color='#6EE7B7', label='Average Rating')
         ax.set_ylabel('Average Rating', color='#6EE7B7')
         ax.tick_params(axis='y', labelcolor='#6EE7B7')
@@ -232,7 +545,7 @@ class HistoryWidget(QWidget):
 
 
         ax2 = ax.twinx()
-        ax2.plot(daily_stats['date'], daily_stats['sentiment'] * 100,
+        ax2.plot(dates, [share * 100 for share in positive_shares],
                  marker='s', color='#93C5FD', label='Positive %')
         ax2.set_ylabel('Positive Sentiment %', color='#93C5FD')
         ax2.tick_params(axis='y', labelcolor='#93C5FD')
@@ -250,8 +563,6 @@ class HistoryWidget(QWidget):
         lines2, labels2 = ax2.get_legend_handles_labels()
         ax.legend(lines + lines2, labels + labels2, loc='upper left')
 
-        self.history_canvas.draw()
-
 
 class BatchAnalysisWidget(QWidget):
 
@@ -285,11 +596,8 @@ class BatchAnalysisWidget(QWidget):
         # Pie chart tab
         pie_tab = QWidget()
         pie_layout = QVBoxLayout(pie_tab)
-        self.pie_figure = plt.figure(facecolor='#353535')
-        self.pie_canvas = FigureCanvas(self.pie_figure)
-        self.pie_toolbar = NavigationToolbar(self.pie_canvas, self)
-        pie_layout.addWidget(self.pie_toolbar)
-        pie_layout.addWidget(self.pie_canvas)
+        self.pie_chart = LazyChart(self.draw_pie_chart)
+        pie_layout.addWidget(self.pie_chart)
         self.viz_tabs.addTab(pie_tab, "Distribution")
 
     def update_results(self, stats):
@@ -304,19 +612,31 @@ class BatchAnalysisWidget(QWidget):
 
     def update_pie_chart(self, stats):
 
-        self.pie_figure.clear()
-        ax = self.pie_figure.add_subplot(111)
+        self.pie_chart.set_data({
+            'positive_pct': stats['positive_pct'],
+            'negative_pct': stats['negative_pct'],
+        })
+
+    @staticmethod
+    def draw_pie_chart(figure, stats):
+
+        ax = figure.add_subplot(111)
 
         labels = ['Positive', 'Negative']
         sizes = [stats['positive_pct'], stats['negative_pct']]
         colors = ['#6EE7B7', '#FCA5A5']
 
+        if not sum(sizes):
+            # e.g. an all-neutral batch: nothing to split
+            ax.text(0.5, 0.5, 'No positive or negative reviews',
+                    ha='center', va='center', color='white')
+            ax.set_axis_off()
+            return
+
         ax.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%',
                startangle=90, textprops={'color': 'white'})
         ax.set_title('Sentiment Distribution', color='white')
 
-        self.pie_canvas.draw()
-
     def create_stat_card(self, title, value):
 
         card = QFrame()
@@ -355,8 +675,23 @@ class SentimentAnalysisApp(QMainWindow):
     def __init__(self):
         super().__init__()
         self.analyzer = None
+        self.review_index = None
+        # Full texts scored before the index finished loading
+        self.pending_index_reviews = []
         self.history = []
         self.dark_mode = True
+        self.export_worker = None
+
+        # Live preview state: every keystroke bumps the generation so that
+        # results from superseded requests are dropped instead of rendered
+        self.live_generation = 0
+        self.live_pool = QThreadPool(self)
+        self.live_pool.setMaxThreadCount(1)
+        self.live_timer = QTimer(self)
+        self.live_timer.setSingleShot(True)
+        self.live_timer.setInterval(LIVE_ANALYSIS_DELAY_MS)
+        self.live_timer.timeout.connect(self.start_live_analysis)
+
         self.setup_ui()
         self.load_models()
 
@@ -428,6 +763,7 @@ class SentimentAnalysisApp(QMainWindow):
 
         self.review_input = QTextEdit()
         self.review_input.setPlaceholderText("Enter bank review text...")
+        self.review_input.textChanged.connect(self.schedule_live_analysis)
         single_layout.addWidget(self.review_input)
 
         analyze_btn = QPushButton("Analyze")
@@ -487,6 +823,69 @@ class SentimentAnalysisApp(QMainWindow):
         except Exception as e:
             self.model_status.setText("Model Status: Failed to load")
             QMessageBox.critical(self, "Error", f"Failed to load models: {str(e)}")
+            return
+
+        # Similar-review search is optional: load or build its index in the background
+        task = IndexBuildTask(self.analyzer.vectorizer,
+                              "../data/cleaned/updated_dataset.csv",
+                              "../models/review_index.pkl")
+        task.signals.ready.connect(self.on_index_ready)
+        task.signals.failed.connect(
+            lambda error: self.status_bar.showMessage(f"Similar reviews unavailable: {error}", 5000))
+        QThreadPool.globalInstance().start(task)
+
+    def on_index_ready(self, index):
+        """Install the similar-reviews index and add reviews analyzed meanwhile"""
+        for text, rating in self.pending_index_reviews:
+            index.add(text, rating)
+        self.pending_index_reviews = []
+        self.review_index = index
+        self.status_bar.showMessage(f"Similar reviews index ready ({len(index)} reviews)", 3000)
+
+    def show_similar(self, text):
+        """Show the reviews closest to text (milliseconds via the inverted index)"""
+        if self.review_index is None:
+            return
+        self.single_result_widget.update_similar(self.review_index.search(text, k=10, exclude_text=text))
+
+    def index_review(self, text, rating):
+        """Make a newly scored review searchable"""
+        if self.review_index is not None:
+            self.review_index.add(text, rating)
+        else:
+            self.pending_index_reviews.append((text, rating))
+
+    def schedule_live_analysis(self):
+        """Coalesce keystrokes: restart the debounce timer on every edit"""
+        self.live_generation += 1
+        self.live_timer.start()
+
+    def start_live_analysis(self):
+        """Queue a background preview for the current text"""
+        text = self.review_input.toPlainText().strip()
+        if not text:
+            # Nothing left to preview: discard in-flight results and clear the cards
+            self.live_generation += 1
+            self.live_pool.clear()
+            self.single_result_widget.reset()
+            return
+        if self.analyzer is None:
+            return
+
+        # Drop queued previews that have not started yet
+        self.live_pool.clear()
+
+        task = LiveAnalysisTask(self.analyzer, text, self.live_generation,
+                                lambda: self.live_generation)
+        task.signals.finished.connect(self.on_live_result)
+        self.live_pool.start(task)
+
+    def on_live_result(self, generation, result):
+        """Render a live preview only if it is still the newest request"""
+        if generation != self.live_generation:
+            return
+        self.single_result_widget.update_results(result, preview=True)
+        self.show_similar(self.review_input.toPlainText().strip())
 
     def analyze_single_review(self):
         """Analyze a single review"""
@@ -495,6 +894,10 @@ class SentimentAnalysisApp(QMainWindow):
             QMessageBox.warning(self, "Warning", "Please enter review text!")
             return
 
+        # A committed analysis supersedes any pending live preview
+        self.live_timer.stop()
+        self.live_generation += 1
+
         try:
             result = self.analyzer.analyze_review(text)
 
@@ -510,6 +913,8 @@ class SentimentAnalysisApp(QMainWindow):
 
             # Update UI
             self.single_result_widget.update_results(result)
+            self.show_similar(text)
+            self.index_review(text, result["rating"])
             self.results_tabs.setCurrentIndex(0)
             self.history_widget.update_history(self.history)
             self.status_bar.showMessage("Analysis completed", 3000)
@@ -527,14 +932,12 @@ class SentimentAnalysisApp(QMainWindow):
         reviews = [line.strip() for line in text.split('\n') if line.strip()]
 
         try:
-            # Analyze each review
-            ratings = []
-            sentiments = []
+            # Analyze each review, folding results into one-pass stats
+            batch_stats = ReviewStats()
 
             for review in reviews:
                 result = self.analyzer.analyze_review(review)
-                ratings.append(result["rating"])
-                sentiments.append(result["sentiment"])
+                batch_stats.add(result["rating"], result["sentiment"])
 
                 # Store in history
                 self.history.append({
@@ -544,18 +947,10 @@ class SentimentAnalysisApp(QMainWindow):
                     "sentiment": result["sentiment"],
                     "confidence": result["confidence"]
                 })
+                self.index_review(review, result["rating"])
 
-            # Calculate stats
-            positive_count = sentiments.count("positive")
-            negative_count = sentiments.count("negative")
-            total = len(reviews)
-
-            stats = {
-                "avg_rating": sum(ratings) / total,
-                "positive_pct": (positive_count / total) * 100,
-                "negative_pct": (negative_count / total) * 100,
-                "total_reviews": total
-            }
+            stats = batch_stats.summary()
+            total = stats["total_reviews"]
 
             # Update UI
             self.batch_result_widget.update_results(stats)
@@ -567,22 +962,49 @@ class SentimentAnalysisApp(QMainWindow):
             QMessageBox.critical(self, "Error", f"Batch analysis failed: {str(e)}")
 
     def export_results(self):
-        """Export analysis results to CSV"""
+        """Export analysis results to CSV, gzip CSV or Parquet in the background"""
         if not self.history:
             QMessageBox.warning(self, "Warning", "No results to export!")
             return
 
+        if self.export_worker is not None and self.export_worker.isRunning():
+            QMessageBox.warning(self, "Warning", "An export is already running!")
+            return
+
         options = QFileDialog.Options()
-        file_name, _ = QFileDialog.getSaveFileName(
-            self, "Save Results", "", "CSV Files (*.csv)", options=options)
+        file_name, selected_filter = QFileDialog.getSaveFileName(
+            self, "Save Results", "",
+            "CSV Files (*.csv);;Gzip CSV Files (*.csv.gz);;Parquet Files (*.parquet)",
+            options=options)
+
+        if not file_name:
+            return
 
-        if file_name:
-            try:
-                df = pd.DataFrame(self.history)
-                df.to_csv(file_name, index=False)
-                self.status_bar.showMessage(f"Results exported to {file_name}", 3000)
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Export failed: {str(e)}")
+        # Add the extension of the chosen filter when the user typed none
+        if "*.csv.gz" in selected_filter and not file_name.lower().endswith(".csv.gz"):
+            file_name += ".csv.gz"
+        elif "*.parquet" in selected_filter and not file_name.lower().endswith(".parquet"):
+            file_name += ".parquet"
+
+        options_dialog = ExportOptionsDialog(self)
+        if options_dialog.exec_() != QDialog.Accepted:
+            return
+
+        progress_dialog = QProgressDialog("Exporting history...", "Cancel", 0, len(self.history), self)
+        progress_dialog.setWindowTitle("Export")
+        progress_dialog.setWindowModality(Qt.WindowModal)
+        progress_dialog.setMinimumDuration(500)
+
+        worker = ExportWorker(self.history, file_name, options_dialog.filters(), self)
+        worker.progress.connect(lambda done, total: progress_dialog.setValue(done))
+        progress_dialog.canceled.connect(worker.requestInterruption)
+        worker.completed.connect(lambda written: self.status_bar.showMessage(
+            f"Exported {written} results to {file_name}", 3000))
+        worker.cancelled.connect(lambda: self.status_bar.showMessage("Export cancelled", 3000))
+        worker.failed.connect(lambda error: QMessageBox.critical(self, "Error", f"Export failed: {error}"))
+        worker.finished.connect(progress_dialog.reset)
+        self.export_worker = worker
+        worker.start()
 
     def clear_history(self):
         """Clear the analysis history"""
@@ -604,6 +1026,24 @@ class SentimentAnalysisApp(QMainWindow):
                           "©Bank Customer Feedback Tool\n"
                           "ENSAO")
 
+    def closeEvent(self, event):
+        """Let background work finish before the window is destroyed"""
+        # A partial export is cancelled (and its file removed) rather than left running
+        if self.export_worker is not None and self.export_worker.isRunning():
+            self.export_worker.requestInterruption()
+            self.export_worker.wait()
+
+        self.live_timer.stop()
+        self.live_generation += 1
+        self.live_pool.clear()
+        self.live_pool.waitForDone()
+
+        # Chart renders are shared by every LazyChart and would outlive the widgets
+        if LazyChart.render_pool is not None:
+            LazyChart.render_pool.clear()
+            LazyChart.render_pool.waitForDone()
+        super().closeEvent(event)
+
 
 if __name__ == '__main__':
     app = QApplication(sys.argv)
@@ -0,0 +1,178 @@
+import argparse
+import re
+import unicodedata
+import zlib
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+# Prime just above 2**32: a * h + b stays below 2**64 for 32-bit a, b and h
+HASH_PRIME = np.uint64(4294967311)
+
+PUNCTUATION = re.compile(r"[^\w\s]", re.UNICODE)
+REPEATS = re.compile(r"(.)\1+", re.UNICODE | re.DOTALL)
+SPACES = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    """
+    Canonical form used for duplicate detection only.
+
+    Lower-cases, drops the "…" truncation marker, folds punctuation to spaces
+    and collapses repeated characters, so "Bon service !!" and "bon service"
+    or "👍👍👍" and "👍" end up identical. Emoji-only reviews keep their emoji.
+    """
+    text = unicodedata.normalize("NFKC", str(text)).lower().replace("…", " ")
+    stripped = SPACES.sub(" ", PUNCTUATION.sub(" ", text)).strip()
+    if not stripped:
+        # Nothing but symbols/emoji: keep them rather than collapsing to ""
+        stripped = SPACES.sub("", text)
+    return REPEATS.sub(r"\1", stripped)
+
+
+def shingles(text: str, k: int = 4) -> np.ndarray:
+    """32-bit hashes of the distinct character k-grams of a normalized text."""
+    if len(text) <= k:
+        grams = {text}
+    else:
+        grams = {text[i:i + k] for i in range(len(text) - k + 1)}
+    return np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint64, count=len(grams))
+
+
+class MinHasher:
+    """MinHash signatures from num_perm universal hash functions (a * x + b) mod p."""
+
+    def __init__(self, num_perm: int = 128, seed: int = 42):
+        rng = np.random.RandomState(seed)
+        self.a = rng.randint(1, 2 ** 32 - 1, size=num_perm, dtype=np.uint64)[:, None]
+        self.b = rng.randint(0, 2 ** 32 - 1, size=num_perm, dtype=np.uint64)[:, None]
+        self.num_perm = num_perm
+
+    def signature(self, hashes: np.ndarray) -> np.ndarray:
+        return ((self.a * hashes[None, :] + self.b) % HASH_PRIME).min(axis=1)
+
+
+class UnionFind:
+    def __init__(self, n: int):
+        self.parent = np.arange(n)
+
+    def find(self, x: int) -> int:
+        root = x
+        while self.parent[root] != root:
+            root = self.parent[root]
+        while self.parent[x] != root:
+            self.parent[x], x = root, self.parent[x]
+        return root
+
+    def union(self, x: int, y: int):
+        root_x, root_y = self.find(x), self.find(y)
+        if root_x != root_y:
+            self.parent[max(root_x, root_y)] = min(root_x, root_y)
+
+
+def cluster_texts(texts: List[str], threshold: float = 0.8, num_perm: int = 128, bands: int = 16,
+                  k: int = 4, seed: int = 42) -> np.ndarray:
+    """
+    Assign a cluster ID to every text so that near-duplicates share an ID.
+
+    Exact duplicates (after normalize) are merged by hashing before any
+    MinHash work, so heavily repeated reviews cost one signature. Each unique
+    text is MinHashed, its signature cut into `bands` bands, and texts that
+    land in the same band bucket are merged if their estimated Jaccard
+    similarity reaches `threshold`. Candidates are only compared to the
+    first text of their bucket, so the cost is linear in the number of texts.
+    Cluster IDs are 0..n_clusters-1 in order of first appearance.
+    """
+    if num_perm % bands:
+        raise ValueError("num_perm must be divisible by bands")
+    rows = num_perm // bands
+
+    # Exact duplicates first
+    unique_ids: Dict[str, int] = {}
+    text_to_unique = np.empty(len(texts), dtype=np.int64)
+    for i, text in enumerate(texts):
+        text_to_unique[i] = unique_ids.setdefault(normalize(text), len(unique_ids))
+    unique_texts = list(unique_ids)
+
+    hasher = MinHasher(num_perm, seed)
+    signatures = np.empty((len(unique_texts), num_perm), dtype=np.uint64)
+    for i, text in enumerate(unique_texts):
+        signatures[i] = hasher.signature(shingles(text, k))
+
+    # LSH banding: one dictionary per band maps band content to a representative
+    groups = UnionFind(len(unique_texts))
+    for band in range(bands):
+        buckets = {}
+        band_values = signatures[:, band * rows:(band + 1) * rows]
+        for i in range(len(unique_texts)):
+            representative = buckets.setdefault(band_values[i].tobytes(), i)
+            if representative != i and groups.find(representative) != groups.find(i):
+                similarity = np.mean(signatures[representative] == signatures[i])
+                if similarity >= threshold:
+                    groups.union(representative, i)
+
+    # Compact roots into consecutive IDs
+    roots = np.array([groups.find(i) for i in range(len(unique_texts))], dtype=np.int64)
+    _, first_seen, inverse = np.unique(roots, return_index=True, return_inverse=True)
+    order = np.argsort(np.argsort(first_seen))
+    return order[inverse][text_to_unique]
+
+
+def add_cluster_ids(df: pd.DataFrame, text_column: str = "Review Text", **kwargs) -> pd.DataFrame:
+    """Copy of df with a cluster_id column and the size of each cluster."""
+    df = df.copy()
+    df["cluster_id"] = cluster_texts(df[text_column].fillna("").astype(str).tolist(), **kwargs)
+    df["cluster_size"] = df.groupby("cluster_id")["cluster_id"].transform("size")
+    return df
+
+
+def group_train_test_split(df: pd.DataFrame, groups, test_size: float = 0.3, random_state: int = 42):
+    """
+    Train/test split that keeps every duplicate cluster on one side.
+    """
+    from sklearn.model_selection import GroupShuffleSplit
+
+    splitter = GroupShuffleSplit(n_splits=1, test_size=test_size, random_state=random_state)
+    train_idx, test_idx = next(splitter.split(df, groups=groups))
+    return df.iloc[train_idx], df.iloc[test_idx]
+
+
+def collapse_clusters(df: pd.DataFrame, label_column: str) -> pd.DataFrame:
+    """
+    One row per (cluster, label), keeping the first review as representative
+    and its count as a `weight` column (for sample_weight during training).
+    Near-duplicates with different labels are kept apart.
+    """
+    grouped = df.groupby(["cluster_id", label_column], sort=False)
+    collapsed = grouped.head(1).copy()
+    collapsed["weight"] = grouped[label_column].transform("size").loc[collapsed.index]
+    return collapsed.reset_index(drop=True)
+
+
+def load_clusters(path: str) -> np.ndarray:
+    """Cluster IDs written by this module, aligned with the cleaned datasets' rows."""
+    return pd.read_csv(path)["cluster_id"].to_numpy()
+
+
+if __name__ == "__main__":
+    import time
+
+    parser = argparse.ArgumentParser(description="Find near-duplicate reviews with MinHash/LSH")
+    parser.add_argument("--data", default="../data/cleaned/updated_dataset.csv")
+    parser.add_argument("--output", default="../data/cleaned/updated_dataset_clusters.csv")
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--num-perm", type=int, default=128)
+    parser.add_argument("--bands", type=int, default=16)
+    args = parser.parse_args()
+
+    df = pd.read_csv(args.data)
+    start = time.perf_counter()
+    clustered = add_cluster_ids(df, threshold=args.threshold, num_perm=args.num_perm, bands=args.bands)
+    elapsed = time.perf_counter() - start
+
+    clustered[["cluster_id", "cluster_size"]].to_csv(args.output, index=False)
+    n_clusters = clustered["cluster_id"].nunique()
+    print(f"{len(df)} reviews -> {n_clusters} clusters in {elapsed:.2f}s")
+    print(clustered.sort_values("cluster_size", ascending=False)
+          .drop_duplicates("cluster_id")[["cluster_size", "Review Text"]].head(10).to_string(index=False))
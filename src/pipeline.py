@@ -0,0 +1,424 @@
+import argparse
+import hashlib
+import inspect
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from typing import Callable, Dict, List, Optional
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# Absolute paths so the pipeline works from any working directory
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(SRC_DIR)
+STATE_PATH = os.path.join(ROOT, "models", "pipeline_state.json")
+
+
+def path(*parts):
+    return os.path.join(ROOT, *parts)
+
+
+RAW_DATA = path("data", "raw", "original_data.csv")
+UPDATED_DATASET = path("data", "cleaned", "updated_dataset.csv")
+REVIEW_DATASET = path("data", "cleaned", "review_dataset.csv")
+STAR_DATASET = path("data", "cleaned", "star_dataset.csv")
+REVIEW_CLUSTERS = path("data", "cleaned", "review_dataset_clusters.csv")
+UPDATED_CLUSTERS = path("data", "cleaned", "updated_dataset_clusters.csv")
+VECTORIZER = path("models", "vectorizer.pkl")
+SENTIMENT_MODEL = path("models", "model_sentiment.pkl")
+STAR_MODEL = path("models", "model_star.pkl")
+STAR_TRAIN_ROWS = path("models", "star_train_rows.json")
+SENTIMENT_METRICS = path("reports", "sentiment_evaluation.json")
+STAR_METRICS = path("reports", "star_rating_evaluation_upsampled.json")
+PIPELINE_EVALUATION = path("reports", "pipeline_evaluation.json")
+SUMMARY_REPORT = path("reports", "model_summary.md")
+
+DEFAULT_PARAMS = {
+    "dedupe": {"threshold": 0.8, "num_perm": 128, "bands": 16},
+    "split": {"group_duplicates": False},
+    "vectorizer": {"max_features": 5000},
+    "sentiment": {"engine": "gradient_boosting", "n_jobs": -1},
+}
+
+
+class Stage:
+    """
+    One pipeline step with declared inputs, outputs, parameters and code.
+
+    A stage is skipped when the fingerprint of its input files, parameters,
+    source files and stage function (plus any helpers it calls) matches the
+    one recorded on its last successful run and all of its outputs still exist.
+    """
+
+    def __init__(self, name: str, func: Callable, inputs: List[str], outputs: List[str],
+                 deps: Optional[List[str]] = None, code: Optional[List[str]] = None,
+                 params: Optional[List[str]] = None, helpers: Optional[List[Callable]] = None,
+                 cluster_inputs: Optional[List[str]] = None):
+        self.name = name
+        self.func = func
+        self.inputs = inputs
+        self.outputs = outputs
+        self.deps = deps or []
+        self.code = code or []
+        self.params = params or []
+        self.helpers = helpers or []
+        # Only read (and so only hashed and waited for) with split.group_duplicates
+        self.cluster_inputs = cluster_inputs or []
+
+    def all_inputs(self, params: Dict[str, dict]) -> List[str]:
+        if self.cluster_inputs and grouping_enabled(params):
+            return self.inputs + self.cluster_inputs
+        return self.inputs
+
+    def all_deps(self, params: Dict[str, dict]) -> List[str]:
+        if self.cluster_inputs and grouping_enabled(params):
+            return self.deps + ["dedupe"]
+        return self.deps
+
+    def stage_params(self, params: Dict[str, dict]) -> dict:
+        """The parameter groups this stage reads, merged into one dict."""
+        merged = {}
+        for group in self.params:
+            merged.update(params.get(group, {}))
+        return merged
+
+    def fingerprint(self, params: Dict[str, dict]) -> Optional[str]:
+        """Hash of inputs, parameters and code; None if an input is missing."""
+        digest = hashlib.sha256()
+        for file_path in self.all_inputs(params) + [os.path.join(SRC_DIR, name) for name in self.code]:
+            if not os.path.exists(file_path):
+                return None
+            digest.update(os.path.relpath(file_path, ROOT).encode("utf-8"))
+            digest.update(file_hash(file_path).encode("utf-8"))
+        # The stage bodies live in this file, so hash their own source
+        for func in [self.func] + self.helpers:
+            digest.update(inspect.getsource(func).encode("utf-8"))
+        digest.update(json.dumps(self.stage_params(params), sort_keys=True).encode("utf-8"))
+        return digest.hexdigest()
+
+    def outputs_exist(self) -> bool:
+        return all(os.path.exists(output) for output in self.outputs)
+
+
+def grouping_enabled(params: Dict[str, dict]) -> bool:
+    return bool(params.get("split", {}).get("group_duplicates"))
+
+
+def file_hash(file_path: str, block_size: int = 1 << 20) -> str:
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+# Stage functions run in worker processes, so they import lazily and only
+# take picklable arguments.
+
+def clean_stage(params):
+    from clean_data import clean_files
+    clean_files(RAW_DATA, os.path.dirname(UPDATED_DATASET))
+
+
+def dedupe_stage(params):
+    import pandas as pd
+    from near_duplicates import add_cluster_ids
+
+    for dataset, clusters_path in [(REVIEW_DATASET, REVIEW_CLUSTERS), (UPDATED_DATASET, UPDATED_CLUSTERS)]:
+        clustered = add_cluster_ids(pd.read_csv(dataset), **params)
+        clustered[["cluster_id", "cluster_size"]].to_csv(clusters_path, index=False)
+
+
+def split_clusters(params, clusters_path):
+    """Cluster IDs for a grouped split, or None for the plain random split."""
+    if not params.get("group_duplicates"):
+        return None
+    from near_duplicates import load_clusters
+    return load_clusters(clusters_path)
+
+
+def vectorizer_stage(params):
+    import joblib
+    import pandas as pd
+    from train_sentiment import split_reviews, fit_vectorizer
+
+    train_df, _ = split_reviews(pd.read_csv(REVIEW_DATASET), split_clusters(params, REVIEW_CLUSTERS))
+    vectorizer = fit_vectorizer(train_df['Review Text'], max_features=params["max_features"])
+    joblib.dump(vectorizer, VECTORIZER)
+
+
+def sentiment_stage(params):
+    import joblib
+    import pandas as pd
+    from train_sentiment import split_reviews, evaluate_engine
+
+    train_df, test_df = split_reviews(pd.read_csv(REVIEW_DATASET), split_clusters(params, REVIEW_CLUSTERS))
+    vectorizer = joblib.load(VECTORIZER)
+    model, result = evaluate_engine(
+        params["engine"],
+        vectorizer.transform(train_df['Review Text']), train_df['sentiment'],
+        vectorizer.transform(test_df['Review Text']), test_df['sentiment'],
+        params["n_jobs"],
+    )
+    joblib.dump(model, SENTIMENT_MODEL)
+    with open(SENTIMENT_METRICS, "w") as f:
+        json.dump(result, f, indent=2)
+
+
+def star_stage(params):
+    from train_star import train_star
+    train_star(UPDATED_DATASET, VECTORIZER, STAR_MODEL, STAR_METRICS,
+               clusters=split_clusters(params, UPDATED_CLUSTERS), train_rows_path=STAR_TRAIN_ROWS)
+
+
+def star_training_texts(params):
+    """
+    Review texts the star model was trained on. With a grouped split, every
+    text of a training cluster counts, since the split kept clusters whole.
+    """
+    import numpy as np
+    import pandas as pd
+
+    texts = pd.read_csv(UPDATED_DATASET)['Review Text']
+    with open(STAR_TRAIN_ROWS) as f:
+        rows = json.load(f)
+    clusters = split_clusters(params, UPDATED_CLUSTERS)
+    if clusters is not None:
+        rows = np.flatnonzero(np.isin(clusters, clusters[rows]))
+    return set(texts.iloc[rows])
+
+
+def evaluate_stage(params):
+    """
+    Score both models end to end on review rows neither was trained on.
+
+    The star model is trained on its own split of updated_dataset.csv, which
+    contains every review_dataset.csv text, so the sentiment test split is
+    narrowed to texts outside the star model's training rows.
+    """
+    import joblib
+    import pandas as pd
+    from sklearn.metrics import accuracy_score
+    from train_sentiment import split_reviews
+
+    _, test_df = split_reviews(pd.read_csv(REVIEW_DATASET), split_clusters(params, REVIEW_CLUSTERS))
+    held_out = ~test_df['Review Text'].isin(star_training_texts(params))
+    if not held_out.any():
+        raise ValueError("No review held out from both the sentiment and star training sets")
+    excluded = int((~held_out).sum())
+    test_df = test_df[held_out]
+    vectorizer = joblib.load(VECTORIZER)
+    X_test = vectorizer.transform(test_df['Review Text'])
+
+    sentiment_preds = joblib.load(SENTIMENT_MODEL).predict(X_test)
+    # Star predictions mapped to the dataset's sentiment rule (>= 3 is positive)
+    star_preds = joblib.load(STAR_MODEL).predict(X_test)
+    star_sentiment = (star_preds >= 3).astype(int)
+
+    evaluation = {
+        "test_rows": len(test_df),
+        "excluded_star_training_rows": excluded,
+        "sentiment_model_accuracy": accuracy_score(test_df['sentiment'], sentiment_preds),
+        "star_model_sentiment_accuracy": accuracy_score(test_df['sentiment'], star_sentiment),
+        "models_agree": float((sentiment_preds == star_sentiment).mean()),
+    }
+    with open(PIPELINE_EVALUATION, "w") as f:
+        json.dump(evaluation, f, indent=2)
+
+
+def report_stage(params):
+    with open(SENTIMENT_METRICS) as f:
+        sentiment = json.load(f)
+    with open(STAR_METRICS) as f:
+        star = json.load(f)
+    with open(PIPELINE_EVALUATION) as f:
+        evaluation = json.load(f)
+
+    lines = [
+        "# Model summary",
+        "",
+        f"- Sentiment engine: {sentiment['engine']}",
+        f"- Sentiment accuracy: {sentiment['accuracy']:.4f} (fit {sentiment['fit_time_s']:.2f}s)",
+        f"- Star rating accuracy: {star['Accuracy']:.4f}",
+        f"- Star model as sentiment: {evaluation['star_model_sentiment_accuracy']:.4f}",
+        f"- Model agreement: {evaluation['models_agree'] * 100:.1f}%",
+        f"- End-to-end test rows: {evaluation['test_rows']} "
+        f"({evaluation['excluded_star_training_rows']} dropped as star training rows)",
+        "",
+    ]
+    with open(SUMMARY_REPORT, "w") as f:
+        f.write("\n".join(lines))
+
+
+STAGES = [
+    Stage("clean", clean_stage,
+          inputs=[RAW_DATA], outputs=[UPDATED_DATASET, REVIEW_DATASET, STAR_DATASET],
+          code=["clean_data.py"]),
+    Stage("dedupe", dedupe_stage,
+          inputs=[REVIEW_DATASET, UPDATED_DATASET], outputs=[REVIEW_CLUSTERS, UPDATED_CLUSTERS],
+          deps=["clean"], code=["near_duplicates.py"], params=["dedupe"]),
+    Stage("vectorizer", vectorizer_stage,
+          inputs=[REVIEW_DATASET], outputs=[VECTORIZER], cluster_inputs=[REVIEW_CLUSTERS],
+          deps=["clean"], code=["train_sentiment.py"], params=["vectorizer", "split"],
+          helpers=[split_clusters]),
+    Stage("sentiment", sentiment_stage,
+          inputs=[REVIEW_DATASET, VECTORIZER], outputs=[SENTIMENT_MODEL, SENTIMENT_METRICS],
+          cluster_inputs=[REVIEW_CLUSTERS],
+          deps=["vectorizer"], code=["train_sentiment.py"], params=["sentiment", "split"],
+          helpers=[split_clusters]),
+    Stage("star", star_stage,
+          inputs=[UPDATED_DATASET, VECTORIZER], outputs=[STAR_MODEL, STAR_METRICS, STAR_TRAIN_ROWS],
+          cluster_inputs=[UPDATED_CLUSTERS],
+          deps=["clean", "vectorizer"], code=["train_star.py"], params=["split"],
+          helpers=[split_clusters]),
+    Stage("evaluate", evaluate_stage,
+          inputs=[REVIEW_DATASET, UPDATED_DATASET, VECTORIZER, SENTIMENT_MODEL, STAR_MODEL, STAR_TRAIN_ROWS],
+          outputs=[PIPELINE_EVALUATION], cluster_inputs=[REVIEW_CLUSTERS, UPDATED_CLUSTERS],
+          deps=["sentiment", "star"], code=["train_sentiment.py"], params=["split"],
+          helpers=[split_clusters, star_training_texts]),
+    Stage("report", report_stage,
+          inputs=[SENTIMENT_METRICS, STAR_METRICS, PIPELINE_EVALUATION], outputs=[SUMMARY_REPORT],
+          deps=["evaluate"]),
+]
+
+
+def load_state() -> Dict[str, str]:
+    if os.path.exists(STATE_PATH):
+        with open(STATE_PATH) as f:
+            return json.load(f)
+    return {}
+
+
+def save_state(state: Dict[str, str]):
+    with open(STATE_PATH, "w") as f:
+        json.dump(state, f, indent=2, sort_keys=True)
+
+
+def select_stages(stages: List[Stage], targets: Optional[List[str]],
+                  params: Dict[str, dict]) -> List[Stage]:
+    """The target stages plus everything they depend on, in declaration order."""
+    by_name = {stage.name: stage for stage in stages}
+    if not targets:
+        return list(stages)
+    needed = set()
+    pending = list(targets)
+    while pending:
+        name = pending.pop()
+        if name not in by_name:
+            raise ValueError(f"Unknown stage: {name}")
+        if name not in needed:
+            needed.add(name)
+            pending.extend(by_name[name].all_deps(params))
+    return [stage for stage in stages if stage.name in needed]
+
+
+def run_pipeline(stages: List[Stage] = STAGES, targets: Optional[List[str]] = None,
+                 params: Optional[Dict[str, dict]] = None, force: Optional[List[str]] = None,
+                 jobs: Optional[int] = None, dry_run: bool = False) -> Dict[str, str]:
+    """
+    Run the selected stages, skipping those whose fingerprint is unchanged.
+
+    Stages start as soon as their dependencies are done, so independent
+    stages (sentiment and star) run in parallel worker processes. A stage's
+    fingerprint is taken only once its dependencies finished, so an upstream
+    rerun that produces identical files does not invalidate downstream stages.
+    Returns {stage: "skipped" | "ran" | "would run" | "source"}.
+    """
+    params = params or DEFAULT_PARAMS
+    force = set(force or [])
+    selected = select_stages(stages, targets, params)
+    state = load_state()
+    outcome = {}
+    running = {}
+    remaining = list(selected)
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        while remaining or running:
+            for stage in list(remaining):
+                remaining_names = {s.name for s in remaining}
+                deps = stage.all_deps(params)
+                if any(dep in remaining_names or dep in running for dep in deps):
+                    continue
+                remaining.remove(stage)
+
+                # In a dry run, upstream outputs that would be rebuilt don't exist
+                # or are stale yet, so there is nothing meaningful to hash
+                if any(outcome.get(dep) == "would run" for dep in deps):
+                    logger.info(f"[{stage.name}] would run")
+                    outcome[stage.name] = "would run"
+                    continue
+
+                fingerprint = stage.fingerprint(params)
+                if fingerprint is None:
+                    if not deps and stage.outputs_exist():
+                        # Raw sources only (no raw export checked in): committed outputs act as sources
+                        logger.info(f"[{stage.name}] inputs missing, using existing outputs")
+                        outcome[stage.name] = "source"
+                        continue
+                    raise FileNotFoundError(f"Stage {stage.name} is missing inputs: {stage.all_inputs(params)}")
+
+                if (stage.name not in force and "all" not in force
+                        and state.get(stage.name) == fingerprint and stage.outputs_exist()):
+                    logger.info(f"[{stage.name}] up to date, skipped")
+                    outcome[stage.name] = "skipped"
+                    continue
+
+                if dry_run:
+                    logger.info(f"[{stage.name}] would run")
+                    outcome[stage.name] = "would run"
+                    continue
+
+                logger.info(f"[{stage.name}] running")
+                future = pool.submit(stage.func, stage.stage_params(params))
+                running[stage.name] = (future, fingerprint)
+
+            if not running:
+                continue
+
+            done, _ = wait([future for future, _ in running.values()], return_when=FIRST_COMPLETED)
+            for name, (future, fingerprint) in list(running.items()):
+                if future not in done:
+                    continue
+                del running[name]
+                future.result()  # re-raise a stage failure
+                state[name] = fingerprint
+                save_state(state)
+                outcome[name] = "ran"
+                logger.info(f"[{name}] done")
+
+    return outcome
+
+
+def parse_params(overrides: List[str]) -> Dict[str, dict]:
+    """Apply stage.key=value overrides (values parsed as JSON when possible)."""
+    params = {stage: dict(values) for stage, values in DEFAULT_PARAMS.items()}
+    for override in overrides:
+        key, _, raw_value = override.partition("=")
+        stage, _, name = key.partition(".")
+        if not name:
+            raise ValueError(f"Expected stage.key=value, got {override}")
+        try:
+            value = json.loads(raw_value)
+        except ValueError:
+            value = raw_value
+        params.setdefault(stage, {})[name] = value
+    return params
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rebuild data, models and reports, skipping up-to-date stages")
+    parser.add_argument("targets", nargs="*", help="Stages to build (all if omitted): "
+                        + ", ".join(stage.name for stage in STAGES))
+    parser.add_argument("--param", action="append", default=[],
+                        help="Override a parameter, e.g. sentiment.engine=logistic_regression")
+    parser.add_argument("--force", action="append", default=[], help="Rerun a stage (or 'all') regardless of cache")
+    parser.add_argument("--jobs", type=int, default=None, help="Parallel stage processes")
+    parser.add_argument("--dry-run", action="store_true", help="Only report what would run")
+    args = parser.parse_args()
+
+    outcome = run_pipeline(targets=args.targets, params=parse_params(args.param),
+                           force=args.force, jobs=args.jobs, dry_run=args.dry_run)
+    for name, status in outcome.items():
+        print(f"{name:<12} {status}")
@@ -0,0 +1,196 @@
+import hashlib
+import logging
+import os
+from array import array
+from typing import Dict, List, Optional
+
+import joblib
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+
+def vectorizer_fingerprint(vectorizer) -> str:
+    """Identifies the term space an index was built for."""
+    digest = hashlib.sha256()
+    digest.update(str(len(vectorizer.vocabulary_)).encode("utf-8"))
+    digest.update(np.asarray(vectorizer.idf_, dtype=np.float64).tobytes())
+    return digest.hexdigest()
+
+
+def dataset_fingerprint(csv_path: str, block_size: int = 1 << 20) -> str:
+    """Content hash of the dataset an index was built from."""
+    digest = hashlib.sha256()
+    with open(csv_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class ReviewIndex:
+    """
+    Inverted index over the TF-IDF term space for top-k cosine search.
+
+    Each term keeps a posting list of (review id, weight) in compact typed
+    arrays that grow in place, so new reviews can be inserted one at a time.
+    TF-IDF rows are L2-normalized, so the dot product is the cosine.
+
+    Queries only touch the posting lists of their own terms and prune:
+    terms whose idf is below min_idf are ignored, and terms whose posting
+    list is longer than max_posting_fraction of the corpus (near-stopwords)
+    are skipped as long as the query has more selective terms.
+    """
+
+    def __init__(self, vectorizer, min_idf: float = 1.5, max_posting_fraction: float = 0.1):
+        self.vectorizer = vectorizer
+        self.fingerprint = vectorizer_fingerprint(vectorizer)
+        self.dataset_fingerprint = None  # set by build_index
+        self.idf = np.asarray(vectorizer.idf_, dtype=np.float32)
+        self.min_idf = min_idf
+        self.max_posting_fraction = max_posting_fraction
+
+        n_terms = len(vectorizer.vocabulary_)
+        self.posting_docs = [array("i") for _ in range(n_terms)]
+        self.posting_weights = [array("f") for _ in range(n_terms)]
+
+        self.texts = []
+        self.stars = array("f")
+        self.sources = []
+        # Review ids per exact text, so a query can exclude itself without a scan
+        self.text_ids: Dict[str, array] = {}
+
+    def __len__(self):
+        return len(self.texts)
+
+    def add_matrix(self, X, texts: List[str], stars: List[float], source: str):
+        """Bulk insert rows of an already transformed TF-IDF matrix."""
+        first_id = len(self.texts)
+        X = X.tocsc()
+        for term in np.flatnonzero(np.diff(X.indptr)):
+            start, end = X.indptr[term], X.indptr[term + 1]
+            self.posting_docs[term].frombytes((X.indices[start:end] + first_id).astype(np.int32).tobytes())
+            self.posting_weights[term].frombytes(X.data[start:end].astype(np.float32).tobytes())
+
+        for doc_id, text in enumerate(texts, first_id):
+            self.text_ids.setdefault(text, array("i")).append(doc_id)
+        self.texts.extend(texts)
+        self.stars.extend(float(s) for s in stars)
+        self.sources.extend([source] * len(texts))
+
+    def add(self, text: str, stars: float, source: str = "history"):
+        """Insert one newly scored review."""
+        self.add_matrix(self.vectorizer.transform([text]), [text], [stars], source)
+
+    def search(self, text: str, k: int = 10, exclude_text: Optional[str] = None) -> List[Dict[str, object]]:
+        """
+        Top-k most similar reviews as dicts with text, stars, source and score.
+        Reviews identical to exclude_text (e.g. the query itself) are left out.
+        """
+        query = self.vectorizer.transform([text])
+        if query.nnz == 0 or not self.texts:
+            return []
+
+        terms = query.indices
+        weights = query.data
+        keep = self.idf[terms] >= self.min_idf
+        if not keep.any():
+            # Only common words: fall back to the most selective ones
+            keep = self.idf[terms] >= self.idf[terms].max()
+        terms, weights = terms[keep], weights[keep]
+
+        max_postings = max(1, int(self.max_posting_fraction * len(self.texts)))
+        selective = np.array([len(self.posting_docs[t]) <= max_postings for t in terms])
+        if selective.any():
+            terms, weights = terms[selective], weights[selective]
+
+        scores = np.zeros(len(self.texts), dtype=np.float32)
+        for term, weight in zip(terms, weights):
+            if not len(self.posting_docs[term]):
+                continue
+            docs = np.frombuffer(self.posting_docs[term], dtype=np.int32)
+            scores[docs] += weight * np.frombuffer(self.posting_weights[term], dtype=np.float32)
+
+        if exclude_text in self.text_ids:
+            scores[np.frombuffer(self.text_ids[exclude_text], dtype=np.int32)] = 0
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates])]
+
+        return [
+            {
+                "text": self.texts[i],
+                "stars": float(self.stars[i]),
+                "source": self.sources[i],
+                "score": round(float(scores[i]), 4),
+            }
+            for i in candidates
+        ]
+
+    def save(self, path: str):
+        joblib.dump(self, path)
+
+    @staticmethod
+    def load(path: str, vectorizer, csv_path: str) -> Optional["ReviewIndex"]:
+        """
+        Load a saved index, or None if it was built for another vectorizer
+        or from a different version of the dataset.
+        """
+        if not os.path.exists(path):
+            return None
+        index = joblib.load(path)
+        if not hasattr(index, "text_ids"):
+            logger.info(f"Ignoring {path}: saved by an older version")
+            return None
+        if index.fingerprint != vectorizer_fingerprint(vectorizer):
+            logger.info(f"Ignoring {path}: built for a different vectorizer")
+            return None
+        if index.dataset_fingerprint != dataset_fingerprint(csv_path):
+            logger.info(f"Ignoring {path}: {csv_path} changed since it was built")
+            return None
+        index.vectorizer = vectorizer
+        return index
+
+    def __getstate__(self):
+        # The vectorizer is saved separately; keep the index file self-contained otherwise
+        state = self.__dict__.copy()
+        state["vectorizer"] = None
+        return state
+
+
+def build_index(vectorizer, csv_path: str, chunk_size: int = 50000, **kwargs) -> ReviewIndex:
+    """Index the Review Text / Stars columns of a dataset, reading it in chunks."""
+    index = ReviewIndex(vectorizer, **kwargs)
+    index.dataset_fingerprint = dataset_fingerprint(csv_path)
+    for chunk in pd.read_csv(csv_path, usecols=["Review Text", "Stars"], chunksize=chunk_size):
+        chunk = chunk.dropna(subset=["Review Text"])
+        texts = chunk["Review Text"].astype(str).tolist()
+        index.add_matrix(vectorizer.transform(texts), texts, chunk["Stars"].tolist(), "dataset")
+    return index
+
+
+def load_or_build_index(vectorizer, csv_path: str, index_path: str) -> ReviewIndex:
+    index = ReviewIndex.load(index_path, vectorizer, csv_path)
+    if index is None:
+        index = build_index(vectorizer, csv_path)
+        index.save(index_path)
+    return index
+
+
+if __name__ == "__main__":
+    import time
+
+    vectorizer = joblib.load("../models/vectorizer.pkl")
+    start = time.perf_counter()
+    index = build_index(vectorizer, "../data/cleaned/updated_dataset.csv")
+    print(f"Indexed {len(index)} reviews in {time.perf_counter() - start:.2f}s")
+    index.save("../models/review_index.pkl")
+
+    for query in ["Service excellent, je suis très satisfait!", "attente trop longue"]:
+        start = time.perf_counter()
+        matches = index.search(query)
+        print(f"{query} ({(time.perf_counter() - start) * 1000:.1f} ms)")
+        for match in matches:
+            print(f"  {match['score']:.3f}  {match['stars']:.0f}★  {match['text'][:60]}")
@@ -0,0 +1,174 @@
+import math
+from typing import Dict, List, Optional
+
+
+class TDigest:
+    """
+    Small merging t-digest for approximate quantiles in bounded memory.
+
+    Values are buffered and periodically compressed into at most about
+    `compression` centroids; digests built on different chunks can be merged.
+    """
+
+    def __init__(self, compression: int = 100):
+        self.compression = compression
+        self.centroids = []  # sorted [mean, weight] pairs
+        self.buffer = []
+        self.count = 0.0
+        self.min = math.inf
+        self.max = -math.inf
+
+    def add(self, value: float, weight: float = 1.0):
+        self.buffer.append([value, weight])
+        self.count += weight
+        self.min = min(self.min, value)
+        self.max = max(self.max, value)
+        if len(self.buffer) >= self.compression * 5:
+            self._compress()
+
+    def merge(self, other: "TDigest"):
+        self.buffer.extend([c[0], c[1]] for c in other.centroids)
+        self.buffer.extend([c[0], c[1]] for c in other.buffer)
+        self.count += other.count
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+
+    def _k(self, q: float) -> float:
+        # k1 scale function: small centroids near the tails, large in the middle
+        return self.compression / (2 * math.pi) * math.asin(2 * q - 1)
+
+    def _compress(self):
+        if not self.buffer:
+            return
+        points = sorted(self.centroids + self.buffer, key=lambda c: c[0])
+        self.buffer = []
+        total = self.count
+        merged = [list(points[0])]
+        seen = 0.0
+        k_lower = self._k(0.0)
+        for mean, weight in points[1:]:
+            current = merged[-1]
+            q = (seen + current[1] + weight) / total
+            if self._k(q) - k_lower <= 1:
+                new_weight = current[1] + weight
+                current[0] += (mean - current[0]) * weight / new_weight
+                current[1] = new_weight
+            else:
+                seen += current[1]
+                k_lower = self._k(seen / total)
+                merged.append([mean, weight])
+        self.centroids = merged
+
+    def quantile(self, q: float) -> Optional[float]:
+        self._compress()
+        if not self.centroids:
+            return None
+        if len(self.centroids) == 1:
+            return self.centroids[0][0]
+        target = q * self.count
+        cumulative = 0.0
+        previous_mean, previous_mid = self.min, 0.0
+        for mean, weight in self.centroids:
+            mid = cumulative + weight / 2
+            if target <= mid:
+                if mid == previous_mid:
+                    return mean
+                fraction = (target - previous_mid) / (mid - previous_mid)
+                return previous_mean + fraction * (mean - previous_mean)
+            cumulative += weight
+            previous_mean, previous_mid = mean, mid
+        if self.count == previous_mid:
+            return self.max
+        fraction = (target - previous_mid) / (self.count - previous_mid)
+        return previous_mean + fraction * (self.max - previous_mean)
+
+
+class ReviewStats:
+    """
+    One-pass, constant-memory summary of analyzed reviews.
+
+    Tracks count, mean and variance of ratings (Welford), sentiment counts,
+    the star distribution and a t-digest for quantiles. Stats computed on
+    separate chunks can be combined with merge().
+    """
+
+    SENTIMENTS = ("positive", "neutral", "negative")
+    STARS = (1, 2, 3, 4, 5)
+
+    def __init__(self, compression: int = 100):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.sentiment_counts = {s: 0 for s in self.SENTIMENTS}
+        self.star_counts = {s: 0 for s in self.STARS}
+        self.digest = TDigest(compression)
+
+    def add(self, rating: float, sentiment: str):
+        self.count += 1
+        delta = rating - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (rating - self.mean)
+
+        self.sentiment_counts[sentiment] = self.sentiment_counts.get(sentiment, 0) + 1
+        star = min(5, max(1, int(round(rating))))
+        self.star_counts[star] += 1
+        self.digest.add(rating)
+
+    def merge(self, other: "ReviewStats") -> "ReviewStats":
+        """Fold another accumulator into this one (Chan et al. parallel update)."""
+        if other.count == 0:
+            return self
+        total = self.count + other.count
+        delta = other.mean - self.mean
+        self.m2 += other.m2 + delta * delta * self.count * other.count / total
+        self.mean += delta * other.count / total
+        self.count = total
+
+        for sentiment, n in other.sentiment_counts.items():
+            self.sentiment_counts[sentiment] = self.sentiment_counts.get(sentiment, 0) + n
+        for star, n in other.star_counts.items():
+            self.star_counts[star] += n
+        self.digest.merge(other.digest)
+        return self
+
+    @property
+    def variance(self) -> float:
+        """Sample variance of the ratings."""
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self) -> float:
+        return math.sqrt(self.variance)
+
+    def share(self, sentiment: str) -> float:
+        """Fraction of reviews with the given sentiment."""
+        return self.sentiment_counts.get(sentiment, 0) / self.count if self.count else 0.0
+
+    def quantile(self, q: float) -> Optional[float]:
+        return self.digest.quantile(q)
+
+    def star_distribution(self) -> Dict[int, float]:
+        return {star: (n / self.count if self.count else 0.0) for star, n in self.star_counts.items()}
+
+    def summary(self) -> Dict[str, object]:
+        """Dictionary in the shape BatchAnalysisWidget.update_results expects."""
+        return {
+            "avg_rating": self.mean,
+            "std_rating": self.std,
+            "median_rating": self.quantile(0.5),
+            "p90_rating": self.quantile(0.9),
+            "positive_pct": self.share("positive") * 100,
+            "neutral_pct": self.share("neutral") * 100,
+            "negative_pct": self.share("negative") * 100,
+            "star_distribution": self.star_distribution(),
+            "total_reviews": self.count,
+        }
+
+
+def merge_all(parts: List[ReviewStats]) -> ReviewStats:
+    """Combine per-chunk accumulators into a new one."""
+    total = ReviewStats()
+    for part in parts:
+        total.merge(part)
+    return total
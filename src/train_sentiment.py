@@ -1,31 +1,215 @@
+import argparse
+import io
+import json
+import os
+import time
+
 import joblib
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.ensemble import GradientBoostingClassifier
 import pandas as pd
+from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.ensemble import GradientBoostingClassifier, HistGradientBoostingClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.svm import LinearSVC
+from sklearn.pipeline import make_pipeline
+from sklearn.preprocessing import FunctionTransformer
 from sklearn.model_selection import train_test_split
-from sklearn.metrics import confusion_matrix , classification_report
+from sklearn.metrics import confusion_matrix, classification_report, accuracy_score
+
+ENGINES = ["gradient_boosting", "hist_gradient_boosting", "lightgbm", "logistic_regression", "linear_svm"]
+
+
+def split_reviews(df, clusters=None):
+    """
+    Train/test split shared by the script and the training pipeline.
+    With near-duplicate cluster IDs, each cluster stays on one side.
+    """
+    if clusters is not None:
+        from near_duplicates import group_train_test_split
+        return group_train_test_split(df, clusters, test_size=0.3, random_state=42)
+    return train_test_split(df, test_size=0.3, random_state=42)
+
+
+def fit_vectorizer(texts, max_features=5000):
+    vectorizer = TfidfVectorizer(max_features=max_features)
+    vectorizer.fit(texts)
+    return vectorizer
+
+
+def build_model(engine, n_jobs):
+    """
+    Create an untrained classifier for the given engine name.
+    Only LightGBM takes n_jobs; HistGradientBoosting uses the OpenMP threads.
+    """
+    if engine == "gradient_boosting":
+        # Original model, single-threaded
+        return GradientBoostingClassifier(n_estimators=99, learning_rate=0.1, max_depth=3)
+    if engine == "hist_gradient_boosting":
+        # Multi-threaded through OpenMP; densified inside the model so the saved
+        # artifact takes the same sparse TF-IDF input as the other engines.
+        # Imported by module name so the pickle never points at __main__.
+        from train_sentiment import densify as module_densify
+        return make_pipeline(FunctionTransformer(module_densify, accept_sparse=True),
+                             HistGradientBoostingClassifier(max_iter=99, learning_rate=0.1, random_state=42))
+    if engine == "lightgbm":
+        from lightgbm import LGBMClassifier
+        return LGBMClassifier(n_estimators=99, learning_rate=0.1, n_jobs=n_jobs, random_state=42, verbose=-1)
+    if engine == "logistic_regression":
+        # n_jobs is left off: lbfgs fits a binary problem on one core regardless
+        return LogisticRegression(max_iter=1000)
+    if engine == "linear_svm":
+        return LinearSVC(random_state=42)
+    raise ValueError(f"Unknown engine: {engine}")
+
+
+def densify(X):
+    """HistGradientBoosting does not accept sparse input."""
+    if hasattr(X, "toarray"):
+        return X.astype("float32").toarray()
+    return X
+
+
+def fit_params(model, sample_weight):
+    """Route sample_weight to the final estimator when the model is a Pipeline."""
+    if sample_weight is None:
+        return {}
+    if hasattr(model, "steps"):
+        return {f"{model.steps[-1][0]}__sample_weight": sample_weight}
+    return {"sample_weight": sample_weight}
+
+
+def model_size(model):
+    """Size in bytes of the model as written by joblib."""
+    buffer = io.BytesIO()
+    joblib.dump(model, buffer)
+    return buffer.getbuffer().nbytes
+
+
+def evaluate_engine(engine, X_train, y_train, X_test, y_test, n_jobs, sample_weight=None):
+    """
+    Train one engine and measure fit time, predict throughput, size and metrics.
+    """
+    model = build_model(engine, n_jobs)
+
+    start = time.perf_counter()
+    model.fit(X_train, y_train, **fit_params(model, sample_weight))
+    fit_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    preds = model.predict(X_test)
+    predict_time = time.perf_counter() - start
+
+    result = {
+        "engine": engine,
+        "fit_time_s": round(fit_time, 4),
+        "predict_time_s": round(predict_time, 4),
+        "predict_throughput_rows_per_s": round(len(y_test) / predict_time, 1) if predict_time > 0 else None,
+        "model_size_bytes": model_size(model),
+        "accuracy": accuracy_score(y_test, preds),
+        "classification_report": classification_report(y_test, preds, output_dict=True),
+        "confusion_matrix": confusion_matrix(y_test, preds).tolist(),
+    }
+    return model, result
+
+
+def pick_fastest(results, min_accuracy):
+    """Fastest-fitting engine whose accuracy meets the bar, or None."""
+    eligible = [r for r in results if r["accuracy"] >= min_accuracy]
+    if not eligible:
+        return None
+    return min(eligible, key=lambda r: r["fit_time_s"])["engine"]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Train the sentiment model")
+    parser.add_argument("--engine", choices=ENGINES, default=None,
+                        help="Estimator used for the saved model (default: gradient_boosting)")
+    parser.add_argument("--compare", nargs="*", choices=ENGINES, default=None,
+                        help="Benchmark these engines (all if none listed) and write a report")
+    parser.add_argument("--min-accuracy", type=float, default=0.0,
+                        help="Accuracy bar used to pick the fastest engine in the report")
+    parser.add_argument("--n-jobs", type=int, default=-1,
+                        help="Cores used by LightGBM (-1 = all)")
+    parser.add_argument("--group-duplicates", action="store_true",
+                        help="Keep near-duplicate reviews on the same side of the split")
+    parser.add_argument("--collapse-duplicates", action="store_true",
+                        help="Train on one weighted row per near-duplicate cluster")
+    parser.add_argument("--save", action="store_true",
+                        help="Also save the --engine model and vectorizer when comparing")
+    parser.add_argument("--report", default="../reports/sentiment_engine_comparison.json",
+                        help="Where to write the comparison report")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+
+    # Load data
+    df = pd.read_csv("../data/cleaned/review_dataset.csv")
+
+    # Near-duplicate clusters (MinHash/LSH), needed by either option
+    if args.group_duplicates or args.collapse_duplicates:
+        from near_duplicates import add_cluster_ids
+        df = add_cluster_ids(df)
 
-# Load data
-df = pd.read_csv("../data/cleaned/review_dataset.csv")
+    # Split data; collapsing alone keeps the plain random split
+    train_df, test_df = split_reviews(df, df["cluster_id"] if args.group_duplicates else None)
 
+    sample_weight = None
+    if args.collapse_duplicates:
+        from near_duplicates import collapse_clusters
+        train_df = collapse_clusters(train_df, "sentiment")
+        sample_weight = train_df["weight"].to_numpy()
 
-# Split data
-train_df, test_df = train_test_split(df, test_size=0.3, random_state=42)
+    # Vectorize
+    vectorizer = fit_vectorizer(train_df['Review Text'])
+    X_train = vectorizer.transform(train_df['Review Text'])
+    X_test = vectorizer.transform(test_df['Review Text'])
+    y_train = train_df['sentiment']
+    y_test = test_df['sentiment']
 
-# Vectorize
-vectorizer = TfidfVectorizer(max_features=5000)
-X_train = vectorizer.fit_transform(train_df['Review Text'])
-X_test = vectorizer.transform(test_df['Review Text'])
+    # The saved model's engine; only trained alongside --compare when named or saved
+    engine = args.engine or "gradient_boosting"
+    engines = [engine]
+    if args.compare is not None:
+        engines = args.compare or ENGINES
+        if (args.save or args.engine is not None) and engine not in engines:
+            engines = engines + [engine]
 
-# Train model
-model = GradientBoostingClassifier(n_estimators=99, learning_rate=0.1, max_depth=3)
-model.fit(X_train, train_df['sentiment'])
+    # Train and evaluate every requested engine
+    results = []
+    models = {}
+    for name in engines:
+        model, result = evaluate_engine(name, X_train, y_train, X_test, y_test, args.n_jobs, sample_weight)
+        models[name] = model
+        results.append(result)
+        print(f"{name}: accuracy={result['accuracy']:.4f} fit={result['fit_time_s']:.2f}s "
+              f"predict={result['predict_throughput_rows_per_s']} rows/s size={result['model_size_bytes']} B")
 
-# Evaluate
-preds = model.predict(X_test)
-print(classification_report(test_df['sentiment'], preds))
-print("Confusion Matrix:\n", confusion_matrix(test_df['sentiment'], preds))
+    fastest = pick_fastest(results, args.min_accuracy)
+    shown = engine if engine in models else fastest or engines[0]
+    preds = models[shown].predict(X_test)
+    print(f"Details for {shown}:")
+    print(classification_report(y_test, preds))
+    print("Confusion Matrix:\n", confusion_matrix(y_test, preds))
 
+    if args.compare is not None:
+        report = {
+            "n_jobs": args.n_jobs,
+            "group_duplicates": args.group_duplicates,
+            "collapse_duplicates": args.collapse_duplicates,
+            "train_rows": X_train.shape[0],
+            "test_rows": X_test.shape[0],
+            "features": X_train.shape[1],
+            "min_accuracy": args.min_accuracy,
+            "fastest_meeting_bar": fastest,
+            "engines": results,
+        }
+        os.makedirs(os.path.dirname(args.report), exist_ok=True)
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+        print(f"Comparison report written to {args.report}")
 
-joblib.dump(vectorizer, '../models/vectorizer.pkl')
-joblib.dump(model, '../models/model_sentiment.pkl')
\ No newline at end of file
+    # A benchmark run leaves the production model alone unless asked to save
+    if args.compare is None or args.save:
+        joblib.dump(vectorizer, '../models/vectorizer.pkl')
+        joblib.dump(models[engine], '../models/model_sentiment.pkl')
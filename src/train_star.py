@@ -7,68 +7,113 @@ from sklearn.model_selection import train_test_split
 from sklearn.metrics import classification_report, confusion_matrix, accuracy_score
 from lightgbm import LGBMClassifier
 
-# Load dataset
-df = pd.read_csv("../data/cleaned/updated_dataset.csv")
-df["Stars"] = df["Stars"].astype(int)
-
-# Upsample each class to 200 samples (if needed)
-upsampled_classes = []
-for star in df["Stars"].unique():
-    class_df = df[df["Stars"] == star]
-    if len(class_df) < 200:
-        class_df = resample(class_df, replace=True, n_samples=200, random_state=42)
-    upsampled_classes.append(class_df)
-
-df_balanced = pd.concat(upsampled_classes).sample(frac=1, random_state=42)  # shuffle
-
-# Extract features and target
-X = df_balanced["Review Text"]
-y = df_balanced["Stars"]
-
-# Load pre-fitted TF-IDF vectorizer
-vectorizer = joblib.load("../models/vectorizer.pkl")
-X_tfidf = vectorizer.transform(X)
-
-# Train/test split
-X_train, X_test, y_train, y_test = train_test_split(
-    X_tfidf, y, test_size=0.3, random_state=42, stratify=y
-)
-
-# Compute class weights
-classes = np.unique(y_train)
-weights = compute_class_weight(class_weight="balanced", classes=classes, y=y_train)
-class_weight_dict = dict(zip(classes, weights))
-
-# Initialize and train LightGBM classifier
-model = LGBMClassifier(
-    n_estimators=500,
-    learning_rate=0.1,
-    random_state=101,
-    class_weight=class_weight_dict
-)
-model.fit(X_train, y_train)
-
-# Predict and evaluate
-y_pred = model.predict(X_test)
-accuracy = accuracy_score(y_test, y_pred)
-report = classification_report(y_test, y_pred, output_dict=True)
-conf_matrix = confusion_matrix(y_test, y_pred)
-
-# Print results
-print(f"✅ Accuracy: {accuracy:.4f}")
-print("📋 Classification Report:")
-print(json.dumps(report, indent=2))
-
-# Save model
-joblib.dump(model, "../models/model_star.pkl")
-
-# Save evaluation results
-results = {
-    "Accuracy": accuracy,
-    "Classification Report": report,
-    "Confusion Matrix": conf_matrix.tolist()
-}
-with open("../reports/star_rating_evaluation_upsampled.json", "w") as f:
-    json.dump(results, f)
-
-print("✅ Balanced & upsampled classifier model saved and evaluation results stored.")
+
+def train_star(data_path="../data/cleaned/updated_dataset.csv",
+               vectorizer_path="../models/vectorizer.pkl",
+               model_path="../models/model_star.pkl",
+               report_path="../reports/star_rating_evaluation_upsampled.json",
+               clusters=None, train_rows_path=None):
+    """
+    Train the star rating classifier on top of the fitted TF-IDF vectorizer.
+    clusters (near-duplicate IDs aligned with the dataset rows) switch to a
+    grouped split, so duplicates and their upsampled copies stay on one side.
+    train_rows_path, if given, receives the dataset row numbers used for
+    training, so other models can be scored on rows this one never saw.
+    """
+    # Load dataset
+    df = pd.read_csv(data_path)
+    df["Stars"] = df["Stars"].astype(int)
+    if clusters is not None:
+        df["cluster_id"] = np.asarray(clusters)
+
+    # Upsample each class to 200 samples (if needed)
+    upsampled_classes = []
+    for star in df["Stars"].unique():
+        class_df = df[df["Stars"] == star]
+        if len(class_df) < 200:
+            class_df = resample(class_df, replace=True, n_samples=200, random_state=42)
+        upsampled_classes.append(class_df)
+
+    df_balanced = pd.concat(upsampled_classes).sample(frac=1, random_state=42)  # shuffle
+
+    # Extract features and target
+    X = df_balanced["Review Text"]
+    y = df_balanced["Stars"]
+
+    # Load pre-fitted TF-IDF vectorizer
+    vectorizer = joblib.load(vectorizer_path)
+    X_tfidf = vectorizer.transform(X)
+
+    # Train/test split
+    if clusters is not None:
+        from sklearn.model_selection import GroupShuffleSplit
+        splitter = GroupShuffleSplit(n_splits=1, test_size=0.3, random_state=42)
+        train_idx, test_idx = next(splitter.split(X_tfidf, y, groups=df_balanced["cluster_id"]))
+    else:
+        train_idx, test_idx = train_test_split(
+            np.arange(len(y)), test_size=0.3, random_state=42, stratify=y
+        )
+    X_train, X_test = X_tfidf[train_idx], X_tfidf[test_idx]
+    y_train, y_test = y.iloc[train_idx], y.iloc[test_idx]
+
+    if train_rows_path is not None:
+        # Upsampled copies keep their original index, i.e. the dataset row
+        train_rows = sorted(set(df_balanced.index[train_idx].tolist()))
+        with open(train_rows_path, "w") as f:
+            json.dump(train_rows, f)
+
+    # Compute class weights
+    classes = np.unique(y_train)
+    weights = compute_class_weight(class_weight="balanced", classes=classes, y=y_train)
+    class_weight_dict = dict(zip(classes, weights))
+
+    # Initialize and train LightGBM classifier
+    model = LGBMClassifier(
+        n_estimators=500,
+        learning_rate=0.1,
+        random_state=101,
+        class_weight=class_weight_dict
+    )
+    model.fit(X_train, y_train)
+
+    # Predict and evaluate
+    y_pred = model.predict(X_test)
+    accuracy = accuracy_score(y_test, y_pred)
+    report = classification_report(y_test, y_pred, output_dict=True)
+    conf_matrix = confusion_matrix(y_test, y_pred)
+
+    # Print results
+    print(f"✅ Accuracy: {accuracy:.4f}")
+    print("📋 Classification Report:")
+    print(json.dumps(report, indent=2))
+
+    # Save model
+    joblib.dump(model, model_path)
+
+    # Save evaluation results
+    results = {
+        "Accuracy": accuracy,
+        "Classification Report": report,
+        "Confusion Matrix": conf_matrix.tolist()
+    }
+    with open(report_path, "w") as f:
+        json.dump(results, f)
+
+    return results
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Train the star rating model")
+    parser.add_argument("--group-duplicates", action="store_true",
+                        help="Keep near-duplicate reviews on the same side of the split")
+    args = parser.parse_args()
+
+    clusters = None
+    if args.group_duplicates:
+        from near_duplicates import add_cluster_ids
+        clusters = add_cluster_ids(pd.read_csv("../data/cleaned/updated_dataset.csv"))["cluster_id"]
+
+    train_star(clusters=clusters)
+    print("✅ Balanced & upsampled classifier model saved and evaluation results stored.")